@@ -0,0 +1,140 @@
+"""Пакетний імпорт опитувань без UI.
+
+Приклад:
+    python batch_import.py data/surveys --config types.json --workers 4
+
+Конфіг (JSON, необов'язковий):
+    {
+        "organization": "IT Kamianets",
+        "drop_columns": ["Коментар модератора"],
+        "types": {"Ваш вік": "single_choice", "Оцініть предмети": "matrix"},
+        "files": {"wave_1.csv": {"title": "Хвиля 1", "types": {"Побажання": "text"}}}
+    }
+
+Тип сітки ("Питання [Рядок]") задається за текстом питання без дужок і діє на всі її рядки.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.importer import (
+    QUESTION_TYPES, MATRIX_TYPE, SUPPORTED_EXTENSIONS, file_fingerprint, read_survey_file, title_from_filename,
+    default_drop_columns, suggest_types, grid_column_overrides, build_questions, build_survey, build_import_record
+)
+
+def load_config(path):
+    if not path: return {}
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    overrides = [config.get("types", {})] + [f.get("types", {}) for f in config.get("files", {}).values()]
+    for types in overrides:
+        for col, q_type in types.items():
+            if q_type not in QUESTION_TYPES + [MATRIX_TYPE]:
+                raise ValueError(f"Невідомий тип '{q_type}' для колонки '{col}'")
+    return config
+
+def find_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(SUPPORTED_EXTENSIONS)
+    )
+
+def fingerprint_path(path):
+    with open(path, "rb") as f:
+        return file_fingerprint(f.read(), path)
+
+def process_file(path, config):
+    """Виконується у воркер-процесі: парсинг, визначення типів, агрегація. Повертає (опитування, типи)"""
+    filename = os.path.basename(path)
+    file_config = config.get("files", {}).get(filename, {})
+
+    df = read_survey_file(path)
+    participants = len(df)
+    drop = default_drop_columns(df.columns) + config.get("drop_columns", [])
+    df = df.drop(columns=[c for c in df.columns if c in drop])
+
+    overrides = {**config.get("types", {}), **file_config.get("types", {})}
+    misplaced = grid_column_overrides(df.columns, overrides)
+    if misplaced:
+        details = "; ".join(f"'{col}' → вкажіть тип для '{text}'" for col, text in misplaced.items())
+        raise ValueError(f"Тип задано окремим рядкам сітки: {details}")
+    types = suggest_types(df, overrides)
+
+    survey = build_survey(
+        file_config.get("title", title_from_filename(filename)),
+        file_config.get("organization", config.get("organization", "")),
+        participants,
+        build_questions(df, types)
+    )
+    return survey, types
+
+def run_import(paths, config, workers=None, with_description=False, dry_run=False, force=False):
+    fingerprints = {path: fingerprint_path(path) for path in paths}
+    # Однакові експорти в одній папці імпортуються один раз (перший за іменем)
+    first_by_fingerprint = {}
+    for path in paths:
+        original = first_by_fingerprint.setdefault(fingerprints[path], path)
+        if original != path:
+            print(f"♻️ {path}: той самий файл, що й {original}, пропущено")
+    paths = list(first_by_fingerprint.values())
+
+    if not (dry_run or force):
+        from utils.db import find_import
+        known = [path for path in paths if find_import(fingerprints[path])]
+        for path in known:
+            print(f"♻️ {path}: вже імпортовано, пропущено")
+        paths = [path for path in paths if path not in known]
+
+    imported, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, path, config): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                survey, types = future.result()
+                imported.append((path, survey, types))
+                print(f"✅ {path}")
+            except Exception as e:
+                failed.append(path)
+                print(f"❌ {path}: {e}", file=sys.stderr)
+
+    surveys = [survey for _, survey, _ in imported]
+    if with_description:
+        from utils.ai_helper import generate_survey_description
+        for survey in surveys:
+            ai_description = generate_survey_description(survey["title"], survey["questions"])
+            if ai_description:
+                survey["ai_description"] = ai_description
+
+    if surveys and not dry_run:
+        from utils.db import insert_surveys, save_import
+        insert_surveys(surveys)
+        for path, survey, types in imported:
+            save_import(fingerprints[path], build_import_record(survey, os.path.basename(path), types))
+
+    return surveys, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетний імпорт CSV/XLSX опитувань у MongoDB")
+    parser.add_argument("directory", help="Папка з файлами опитувань")
+    parser.add_argument("--config", help="JSON-файл з перевизначенням типів")
+    parser.add_argument("--workers", type=int, default=None, help="Кількість процесів (за замовчуванням — к-сть CPU)")
+    parser.add_argument("--describe", action="store_true", help="Згенерувати AI-опис для кожного опитування")
+    parser.add_argument("--dry-run", action="store_true", help="Обробити файли без запису в БД")
+    parser.add_argument("--force", action="store_true", help="Імпортувати навіть вже імпортовані файли")
+    args = parser.parse_args(argv)
+
+    paths = find_files(args.directory)
+    if not paths:
+        print("Файлів CSV/XLSX не знайдено.", file=sys.stderr)
+        return 1
+
+    surveys, failed = run_import(paths, load_config(args.config), args.workers, args.describe, args.dry_run, args.force)
+    print(f"Імпортовано: {len(surveys)}, помилок: {len(failed)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
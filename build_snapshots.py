@@ -0,0 +1,29 @@
+"""Попередній рендер статичних знімків дашбордів (JSON + HTML у snapshots/).
+
+Приклад:
+    python build_snapshots.py            # усі опитування
+    python build_snapshots.py 123 456    # лише вказані id
+"""
+import argparse
+import sys
+
+from utils.db import get_db
+from utils.snapshot import generate_snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерація статичних знімків дашбордів")
+    parser.add_argument("ids", nargs="*", type=int, help="id опитувань (за замовчуванням — всі)")
+    args = parser.parse_args(argv)
+
+    survey_ids = args.ids or [s["id"] for s in get_db().surveys.find({}, {"_id": 0, "id": 1})]
+    missing = 0
+    for survey_id in survey_ids:
+        if generate_snapshot(survey_id, with_html=True):
+            print(f"✅ {survey_id}")
+        else:
+            missing += 1
+            print(f"❌ {survey_id}: не знайдено", file=sys.stderr)
+    return 1 if missing else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,7 @@ st.markdown("""
 
 # ЗАВАНТАЖЕННЯ ДАНИХ З БД
 try:
-    surveys_data = get_all_surveys()
+    surveys_data = get_all_surveys(read_only=True)
 except Exception as e:
     st.error(f"Помилка підключення до бази даних: {e}")
     st.stop()
@@ -0,0 +1,33 @@
+"""Переносить вбудовані питання опитувань у колекцію `questions`.
+
+Повторний запуск безпечний: питання записуються upsert-ом за (survey_id, index),
+а масив `questions` прибирається з опитування лише після перенесення.
+
+Приклад:
+    python migrate_questions.py
+"""
+import sys
+
+from utils.db import get_db, split_survey
+
+def main():
+    db = get_db()
+    db.questions.create_index([("survey_id", 1), ("index", 1)], unique=True)
+
+    migrated = 0
+    for survey in db.surveys.find({"questions": {"$exists": True}}):
+        meta, docs = split_survey(survey)
+        for doc in docs:
+            db.questions.replace_one({"survey_id": doc["survey_id"], "index": doc["index"]}, doc, upsert=True)
+        db.surveys.update_one(
+            {"_id": survey["_id"]},
+            {"$unset": {"questions": ""}, "$set": {"question_count": meta["question_count"]}, "$inc": {"version": 1}}
+        )
+        migrated += 1
+        print(f"✅ {survey.get('id')}: {len(docs)} питань")
+
+    print(f"Перенесено опитувань: {migrated}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
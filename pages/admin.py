@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-import re
-from utils.db import get_db
-from utils.ai_helper import generate_survey_description
+from utils.db import insert_survey, get_survey_version, find_import, save_import
 from utils.auth import check_password
+from utils.jobs import ACTIVE_STATUSES, submit_job, get_job, poll_job
+from utils.staging import stage_frame, staged_columns, load_frame, discard_frame, cleanup_stale
 
 st.set_page_config(page_title="Адмін-панель", page_icon="🛠")
 
@@ -17,67 +16,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# === ОЧИЩЕННЯ ТЕКСТУ ===
-def clean_question_text(text):
-    """Видаляє нумерацію на початку (наприклад '1. ', '2) ', '1 - ')"""
-    if pd.isna(text): return "Без назви"
-    text = str(text).strip()
-    return re.sub(r'^\d+[\.\)\-\s]+\s*', '', text)
-
-def normalize_text(text):
-    if pd.isna(text): return None
-    text = str(text).strip()
-    garbage = ["", "-", "—", "–", "_", ".", "?", "!", "n/a", "nan", "null", "none", "немає", "не знаю", "no"]
-    if text.lower() in garbage: return None
-    return " ".join(text.split())
-
-def smart_split(text, delimiter=','):
-    if not isinstance(text, str): return [text]
-    pattern = r',\s*(?![^()]*\))'
-    parts = text.split(';') if delimiter == ';' else re.split(pattern, text)
-    return [normalize_text(p) for p in parts if normalize_text(p)]
-
-def detect_type(series):
-    clean_series = series.apply(normalize_text).dropna()
-    if clean_series.empty: return "text"
-    
-    total_rows = len(clean_series)
-    unique_vals = clean_series.nunique()
-    avg_len = clean_series.astype(str).map(len).mean()
-
-    cnt_semicolon = clean_series.str.contains(';', regex=False).sum()
-    if cnt_semicolon >= 1:
-        return "multiple_choice"
-
-    counts = clean_series.value_counts()
-    try:
-        first_chars = [str(k).split()[0] for k in counts.keys()]
-        if all(c.isdigit() and 0 <= int(c) <= 10 for c in first_chars) and len(counts) <= 12:
-            return "rating"
-    except: pass
-
-    if (unique_vals > 50 and (unique_vals / total_rows) > 0.8) or avg_len > 80:
-        return "text"
-
-    return "single_choice"
-
-def format_data_for_type(series, selected_type):
-    clean_series = series.apply(normalize_text).dropna()
-    if selected_type == "text":
-        return {"answers": clean_series.head(300).tolist()} 
-    
-    if selected_type == "multiple_choice":
-        cnt_semicolon = clean_series.str.contains(';', regex=False).sum()
-        delimiter = ';' if cnt_semicolon > 0 else ','
-        expanded_list = []
-        for item in clean_series:
-            expanded_list.extend(smart_split(item, delimiter))
-        counts = pd.Series(expanded_list).value_counts()
-    else:
-        counts = clean_series.value_counts()
-        
-    return counts.head(50).to_dict()
-
 # === UI ===
 st.title("🛠 Імпорт та Налаштування")
 nav_col1, nav_col2, nav_col3 = st.columns([8, 1, 1])
@@ -90,86 +28,155 @@ with nav_col3:
 
 st.divider()
 
+# AI-опис останнього збереженого опитування генерується у фоні
+if st.session_state.get("description_job"):
+    job = get_job(st.session_state.description_job)
+    if job and job["status"] in ACTIVE_STATUSES:
+        poll_job(job["job_id"], "🤖 AI-опис опитування")
+    else:
+        if job and job["status"] == "done": st.success("🤖 AI-опис опитування згенеровано.")
+        elif job: st.warning(f"🤖 Не вдалося згенерувати AI-опис: {job.get('error')}")
+        del st.session_state.description_job
+
 if 'stage' not in st.session_state: st.session_state.stage = 0
-if 'df_clean' not in st.session_state: st.session_state.df_clean = None
+# Дескриптор очищеної таблиці (див. utils/staging.py): велика таблиця живе на диску, а не в сесії
+if 'staged_df' not in st.session_state: st.session_state.staged_df = None
 if 'survey_meta' not in st.session_state: st.session_state.survey_meta = {}
 
+def reset_import():
+    discard_frame(st.session_state.staged_df)
+    st.session_state.staged_df = None
+    st.session_state.stage = 0
+
+cleanup_stale()
+
 uploaded_file = st.file_uploader("1. Оберіть файл (CSV або Excel)", type=["csv", "xlsx", "xls"])
 
+if uploaded_file is None and st.session_state.staged_df is not None:
+    # Файл прибрали посеред імпорту — проміжні дані більше не потрібні
+    reset_import()
+
 if uploaded_file is not None:
+    # pandas потрібен лише після завантаження файлу
+    from utils.importer import (
+        QUESTION_TYPES, MATRIX_TYPE, file_fingerprint, read_survey_file, title_from_filename,
+        default_drop_columns, suggest_types, column_examples, group_questions, build_group_questions,
+        build_questions, build_survey, build_import_record
+    )
+
+    # Повторне завантаження того самого файлу — без ручного налаштування та AI.
+    # Відбиток і запис кешу рахуються раз на файл, а не на кожен rerun
+    upload_check = st.session_state.get("upload_check")
+    if not upload_check or upload_check["file_id"] != uploaded_file.file_id:
+        fingerprint = file_fingerprint(uploaded_file.getvalue(), uploaded_file.name)
+        upload_check = {"file_id": uploaded_file.file_id, "fingerprint": fingerprint, "previous": find_import(fingerprint)}
+        st.session_state.upload_check = upload_check
+    fingerprint, previous = upload_check["fingerprint"], upload_check["previous"]
+
+    if previous and st.session_state.stage == 0 and st.session_state.get("force_import") != fingerprint:
+        survey_exists = get_survey_version(previous["survey_id"]) is not None
+        st.info(f"♻️ Цей файл вже імпортовано {previous.get('date', '')} як «{previous.get('title', '')}».")
+        c1, c2 = st.columns(2)
+        with c1:
+            if survey_exists:
+                if st.button("📊 Відкрити результати", width='stretch', key='open_existing'):
+                    st.session_state["selected_survey_id"] = previous["survey_id"]
+                    st.switch_page("pages/dashboard.py")
+            elif st.button("♻️ Відновити з кешу", width='stretch', key='restore_cached'):
+                restored_questions = build_questions(
+                    read_survey_file(uploaded_file, uploaded_file.name), previous["types"]
+                )
+                restored = build_survey(previous["title"], previous.get("organization", ""),
+                                        previous["participants"], restored_questions)
+                if previous.get("ai_description"):
+                    restored["ai_description"] = previous["ai_description"]
+                try:
+                    insert_survey(restored)
+                except Exception as e:
+                    st.error(f"Не вдалося зберегти опитування: {e}")
+                    st.stop()
+                save_import(fingerprint, {"survey_id": restored["id"]})
+                st.session_state.pop("upload_check", None)
+                st.success("✅ Опитування відновлено без повторного аналізу.")
+                st.stop()
+        with c2:
+            if st.button("🔁 Імпортувати як нове", width='stretch', key='force_import_btn'):
+                st.session_state.force_import = fingerprint
+                st.rerun()
+        st.stop()
+
     if st.session_state.stage == 0:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-
-            df.columns = [clean_question_text(col) for col in df.columns]
-            
+            df = read_survey_file(uploaded_file, uploaded_file.name)
         except Exception as e:
             st.error(f"Помилка при зчитуванні файлу: {e}")
             st.stop()
         
         with st.form("settings_form"):
             st.subheader("2. Основні параметри")
-            clean_filename = uploaded_file.name
-            for ext in [".csv", ".xlsx", ".xls"]:
-                clean_filename = clean_filename.replace(ext, "")
-                
-            title = st.text_input("Назва", value=clean_filename)
+            title = st.text_input("Назва", value=title_from_filename(uploaded_file.name))
             org = st.text_input("Організація", "IT Kamianets")
             
             all_cols = df.columns.tolist()
-            stop_words = ["timestamp", "email", "name", "піб", "пошта"]
-            default_drop = [c for c in all_cols if any(sw in c.lower() for sw in stop_words)]
-            cols_to_drop = st.multiselect("Видалити колонки:", all_cols, default=default_drop)
+            cols_to_drop = st.multiselect("Видалити колонки:", all_cols, default=default_drop_columns(all_cols))
             
             btn_analyze = st.form_submit_button("➡️ Аналізувати питання")
         
         if btn_analyze:
-            st.session_state.df_clean = df.drop(columns=cols_to_drop)
+            df_clean = df.drop(columns=cols_to_drop)
             st.session_state.survey_meta = {
                 "title": title, "org": org, 
                 "participants": len(df)
             }
-            st.session_state.suggested_types = {} 
-            for col in st.session_state.df_clean.columns:
-                st.session_state.suggested_types[col] = detect_type(st.session_state.df_clean[col])
+            cached_types = previous.get("types") if previous else None
+            st.session_state.suggested_types = suggest_types(df_clean, cached_types)
+            st.session_state.column_examples = column_examples(df_clean)
+            discard_frame(st.session_state.staged_df)
+            st.session_state.staged_df = stage_frame(df_clean)
             
             st.session_state.stage = 1
             st.rerun()
 
+    if st.session_state.stage == 1 and st.session_state.staged_df is None:
+        st.session_state.stage = 0
+        st.rerun()
+
     if st.session_state.stage == 1:
         st.info("Перевірте та відредагуйте типи питань")
-        processing_cols = st.session_state.df_clean.columns.tolist()
+        question_groups = group_questions(staged_columns(st.session_state.staged_df))
         
         with st.form("review_form"):
             st.subheader("3. Типи питань")
             user_selected_types = {}
-            type_options = ["single_choice", "multiple_choice", "text", "rating"]
             type_labels = {
                 "single_choice": "🥧 Один вибір (Pie Chart)",
                 "multiple_choice": "📶 Множинний вибір (Bar Chart)",
                 "text": "💬 Текст / Розгорнуті відповіді",
-                "rating": "⭐ Рейтинг (1-5)"
+                "rating": "⭐ Рейтинг (1-5)",
+                "matrix": "🔲 Матриця / Сітка (Stacked Bar)"
             }
 
-            for col in processing_cols:
+            for q_text, cols in question_groups.items():
+                is_grid = len(cols) > 1
+                # Сітку можна зберегти як одну матрицю або як окремі питання по рядках
+                type_options = [MATRIX_TYPE] + QUESTION_TYPES if is_grid else QUESTION_TYPES
                 c1, c2 = st.columns([3, 2])
                 with c1:
-                    st.write(f"**{col}**")
-                    try:
-                        example = str(st.session_state.df_clean[col].dropna().iloc[0])[:60]
+                    st.write(f"**{q_text}**")
+                    if is_grid:
+                        st.caption(f"Сітка: {len(cols)} рядків")
+                    example = st.session_state.column_examples.get(cols[0])
+                    if example is not None:
                         st.caption(f"Приклад: {example}...")
-                    except IndexError:
+                    else:
                         st.caption("Немає даних")
                 with c2:
-                    default = st.session_state.suggested_types.get(col, "single_choice")
-                    user_selected_types[col] = st.selectbox(
+                    default = st.session_state.suggested_types.get(q_text, "single_choice")
+                    user_selected_types[q_text] = st.selectbox(
                         "Тип", type_options, 
-                        index=type_options.index(default),
+                        index=type_options.index(default) if default in type_options else 0,
                         format_func=lambda x: type_labels[x],
-                        key=f"sel_{col}"
+                        key=f"sel_{q_text}"
                     )
                 st.divider()
             
@@ -178,32 +185,40 @@ if uploaded_file is not None:
         if btn_save:
             final_questions = []
             progress_bar = st.progress(0)
-            for idx, col in enumerate(processing_cols):
-                sel_type = user_selected_types[col]
-                q_data = format_data_for_type(st.session_state.df_clean[col], sel_type)
-                
-                final_questions.append({
-                    "text": col,
-                    "type": sel_type,
-                    "data": q_data
-                })
-                progress_bar.progress((idx + 1) / len(processing_cols))
+            for idx, (q_text, cols) in enumerate(question_groups.items()):
+                # Лише колонки цієї групи — таблиця з диска не копіюється в пам'ять цілком
+                group_df = load_frame(st.session_state.staged_df, cols)
+                if group_df is None:
+                    st.warning("⌛ Проміжні дані імпорту застаріли та були видалені. Завантажте файл ще раз.")
+                    reset_import()
+                    st.stop()
+                final_questions.extend(build_group_questions(
+                    group_df, q_text, cols, user_selected_types[q_text]
+                ))
+                progress_bar.progress((idx + 1) / len(question_groups))
 
             meta = st.session_state.survey_meta
-            new_survey = {
-                "id": abs(hash(meta["title"] + pd.Timestamp.now().strftime("%S"))) % 100000,
-                "title": meta["title"],
-                "organization": meta.get("org", ""),
-                "participants": meta["participants"],
-                "date": pd.Timestamp.now().strftime("%Y-%m-%d"),
-                "questions": final_questions
-            }
+            new_survey = build_survey(meta["title"], meta.get("org", ""), meta["participants"], final_questions)
             
-            ai_description = generate_survey_description(meta["title"], final_questions)
-            if ai_description:
-                new_survey["ai_description"] = ai_description
+            # Ті самі питання, що й у кешованому імпорті — опис не генеруємо заново
+            cached = previous or {}
+            same_questions = cached.get("question_texts", []) == [q["text"] for q in final_questions]
+            if same_questions and cached.get("ai_description"):
+                new_survey["ai_description"] = cached["ai_description"]
             
-            get_db().surveys.insert_one(new_survey)
+            try:
+                insert_survey(new_survey)
+            except Exception as e:
+                st.error(f"Не вдалося зберегти опитування: {e}")
+                st.stop()
+            save_import(fingerprint, build_import_record(new_survey, uploaded_file.name, user_selected_types))
+            st.session_state.pop("force_import", None)
+            st.session_state.pop("upload_check", None)
+            reset_import()
+            from utils.ai_helper import get_api_key
+            if not new_survey.get("ai_description") and get_api_key():
+                # Збереження не чекає на модель — опис допишеться у фоні
+                st.session_state.description_job = submit_job("survey_description", {"survey_id": new_survey["id"]})
             st.success("✅ Готово! Опитування збережено. Перейдіть на головну.")
             if st.button("Завантажити ще", key="load_more_btn"):
                 st.session_state.stage = 0
@@ -0,0 +1,99 @@
+import streamlit as st
+import pandas as pd
+from utils.series import get_series_names, get_series_comparison
+
+st.set_page_config(page_title="Порівняння хвиль", layout="wide", initial_sidebar_state="collapsed")
+st.markdown("""
+<style>
+    [data-testid="stSidebar"] {display: none;}
+    [data-testid="stMainMenuButton"] {display: none;}
+    h2 {word-wrap: break-word; overflow-wrap: break-word; word-break: break-word;}
+</style>
+""", unsafe_allow_html=True)
+
+PLOTLY_CONFIG = {
+    'displayModeBar': False,
+    'scrollZoom': False,
+    'showAxisDragHandles': False,
+    'staticPlot': False
+}
+
+if st.button("⬅️ Назад до стрічки"):
+    st.switch_page("main.py")
+
+st.title("📈 Порівняння хвиль опитування")
+
+series_names = get_series_names()
+if not series_names:
+    st.info("Немає серій. Вкажіть однакову «Серію» для кількох опитувань у редакторі.")
+    st.stop()
+
+default_series = st.session_state.get("selected_series")
+selected_series = st.selectbox(
+    "Серія", series_names,
+    index=series_names.index(default_series) if default_series in series_names else 0
+)
+
+waves, comparison = get_series_comparison(selected_series)
+if len(waves) < 2:
+    st.info("У серії лише одна хвиля — порівнювати поки нічого.")
+    st.stop()
+
+wave_labels = [f"{i+1}. {w.get('date', '')}" for i, w in enumerate(waves)]
+with st.expander(f"🌊 Хвилі ({len(waves)})"):
+    for label, w in zip(wave_labels, waves):
+        st.caption(f"{label} — {w.get('title', 'Без назви')} | 👥 {w.get('participants', 0)}")
+
+legacy_waves = [label for label, w in zip(wave_labels, waves) if w.get("legacy")]
+if legacy_waves:
+    st.warning(
+        f"Хвилі {', '.join(legacy_waves)} збережені у старому форматі й не враховуються в порівнянні. "
+        "Запустіть `python migrate_questions.py`, щоб перенести їхні питання."
+    )
+
+if not comparison:
+    st.info("Немає спільних питань з вибором чи рейтингом, які можна порівняти між хвилями.")
+    st.stop()
+
+st.divider()
+
+import plotly.express as px
+
+for i, q in enumerate(comparison):
+    with st.container(border=True):
+        st.subheader(f"{i+1}. {q['text']}")
+        skipped = [wave_labels[w] for w in range(len(waves)) if w not in q["question_waves"]]
+        if skipped:
+            st.caption(f"Питання не ставилося у хвилях: {', '.join(skipped)} — вони не входять у зміни та тренд.")
+
+        chart_rows = [
+            {"Хвиля": wave_labels[w["wave"]], "Відповідь": a["answer"], "Відсоток": w["share"]}
+            for a in q["answers"] for w in a["waves"]
+        ]
+        fig = px.line(pd.DataFrame(chart_rows), x="Хвиля", y="Відсоток", color="Відповідь", markers=True,
+                      category_orders={"Хвиля": wave_labels})
+        fig.update_layout(
+            height=400,
+            legend=dict(orientation="h", y=-0.2, x=0),
+            margin=dict(t=20, b=50),
+            xaxis_fixedrange=True,
+            yaxis_fixedrange=True,
+            xaxis=dict(title=None),
+            yaxis=dict(title="%"),
+            dragmode=False
+        )
+        st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG, key=f"chart_series_{i}")
+
+        last_column = f"Хвиля {wave_labels[q['question_waves'][-1]]}, %"
+        table = pd.DataFrame([
+            {
+                "Відповідь": a["answer"],
+                last_column: a["waves"][-1]["share"],
+                "Δ до попередньої, п.п.": a["waves"][-1]["delta"],
+                "Δ перша → остання, п.п.": a["total_delta"],
+                "Тренд, п.п./хвилю": a["trend"]
+            }
+            for a in q["answers"]
+        ]).sort_values(last_column, ascending=False)
+        st.dataframe(table, hide_index=True, use_container_width=True,
+                     column_config={c: st.column_config.NumberColumn(format="%.1f") for c in table.columns[1:]})
@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.db import get_db, get_all_surveys
-from utils.ai_helper import generate_survey_description
-from bson.objectid import ObjectId
+from utils.db import get_db, get_questions, delete_survey_questions
 from utils.auth import check_password
+from utils.snapshot import invalidate_snapshot, refresh_snapshot
 
 st.set_page_config(page_title="Редактор опитувань", page_icon="✏️", layout="wide")
 
@@ -17,7 +16,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def generate_desc_callback(title, questions):
+def generate_desc_callback(title, survey_id):
+    from utils.ai_helper import generate_survey_description
+    # Для опису потрібні лише тексти питань
+    questions = get_questions(survey_id, fields=["text"])
     ai_desc = generate_survey_description(title, questions)
     if ai_desc:
         st.session_state.editor_desc = ai_desc
@@ -25,18 +27,25 @@ def generate_desc_callback(title, questions):
 
 def get_all_surveys_with_id():
     db = get_db()
-    return list(db.surveys.find({}))
+    # Кількість питань рахується на сервері, вбудовані питання (старий формат) не передаються
+    return list(db.surveys.aggregate([
+        {"$addFields": {"question_count": {"$ifNull": ["$question_count", {"$size": {"$ifNull": ["$questions", []]}}]}}},
+        {"$project": {"questions": 0}}
+    ]))
 
 def update_survey(survey_id, updated_data):
+    from bson.objectid import ObjectId
     db = get_db()
     db.surveys.update_one(
         {"_id": ObjectId(survey_id)},
-        {"$set": updated_data}
+        {"$set": updated_data, "$inc": {"version": 1}}
     )
 
-def delete_survey(survey_id):
+def delete_survey(survey_id, public_id):
+    from bson.objectid import ObjectId
     db = get_db()
     db.surveys.delete_one({"_id": ObjectId(survey_id)})
+    delete_survey_questions(public_id)
 
 def format_date(date_str):
     try:
@@ -109,7 +118,7 @@ if filtered_surveys:
                 date = format_date(survey.get("date", ""))
                 st.caption(f"🏢 {org} | 👥 {participants} учасників | 📅 {date}")
             with col2:
-                st.metric("Питань", len(survey.get("questions", [])))
+                st.metric("Питань", survey.get("question_count", 0))
             with col3:
                 if st.button("✏️ Редагувати", key=f"edit_btn_{idx}"):
                     st.session_state.editing_survey_id = str(survey["_id"])
@@ -145,6 +154,9 @@ if "editing_survey_id" in st.session_state:
             with col2:
                 new_org = st.text_input("Організація", value=editing_survey.get("organization", ""))
             
+            new_series = st.text_input("Серія (однакова назва для хвиль одного опитування)",
+                                       value=editing_survey.get("series") or "")
+            
             st.write("**Додаткова інформація**")
             new_participants = st.number_input("Кількість учасників", 
                                               value=int(editing_survey.get("participants", 0)), 
@@ -169,7 +181,7 @@ if "editing_survey_id" in st.session_state:
                     "🤖 Згенерувати", 
                     width='stretch',
                     on_click=generate_desc_callback,
-                    args=(new_title, editing_survey.get("questions", []))
+                    args=(new_title, editing_survey.get("id"))
                 )
             
             btn_col1, btn_col2, btn_col3 = st.columns(3)
@@ -185,12 +197,14 @@ if "editing_survey_id" in st.session_state:
                 updated_data = {
                     "title": new_title,
                     "organization": new_org,
+                    "series": new_series.strip() or None,
                     "participants": int(new_participants),
                     "date": new_date.strftime("%Y-%m-%d"),
                     "ai_description": final_desc
                 }
                 try:
                     update_survey(st.session_state.editing_survey_id, updated_data)
+                    refresh_snapshot(editing_survey.get("id"))
                     st.success("✅ Опитування успішно оновлено!")
                     del st.session_state.editing_survey_id
                     del st.session_state.editor_desc
@@ -206,7 +220,8 @@ if "editing_survey_id" in st.session_state:
             
             if btn_delete:
                 try:
-                    delete_survey(st.session_state.editing_survey_id)
+                    delete_survey(st.session_state.editing_survey_id, editing_survey.get("id"))
+                    invalidate_snapshot(editing_survey.get("id"))
                     st.success("✅ Опитування видалено!")
                     del st.session_state.editing_survey_id
                     if "editor_desc" in st.session_state:
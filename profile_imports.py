@@ -0,0 +1,97 @@
+"""Профіль часу імпорту для кожної сторінки (холодний старт).
+
+Сторінки Streamlit не можна просто імпортувати, тому скрипт збирає їхні
+імпорти верхнього рівня і виконує їх у чистому процесі з `-X importtime`.
+Відкладені імпорти, які спрацьовують під час першого рендеру, у цей час не входять:
+колонка «+БД» додає драйвер MongoDB (його кожна сторінка завантажує при першому
+зверненні до бази), а `--full` вимірює повний прогін сторінки через AppTest
+(потрібні secrets і доступна база).
+
+Приклад:
+    python profile_imports.py --top 5
+    python profile_imports.py --full
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGES = ["main.py", "pages/dashboard.py", "pages/admin.py", "pages/editor.py", "pages/compare.py"]
+# Що підтягує перше звернення до БД (utils/db.py імпортує драйвер ліниво)
+FIRST_DB_CALL_IMPORTS = ["import pymongo", "import pymongo.read_preferences"]
+FULL_RUN_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+print(f"{(time.perf_counter() - start) * 1000:.1f} {len(at.exception)}")
+"""
+
+def top_level_imports(path):
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+def measure(statements, repeat=3):
+    """Повертає (загальний час у мс, [(мс, модуль), ...]) для імпортів верхнього рівня;
+    з кількох запусків береться найшвидший, щоб зменшити шум дискового кешу"""
+    return min((_measure_once(statements) for _ in range(repeat)), key=lambda r: r[0])
+
+def _measure_once(statements):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Вкладені імпорти мають відступ — рахуємо лише корені дерева
+        if not name.startswith("  "):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in modules), sorted(modules, reverse=True)
+
+def measure_full_run(page):
+    """(мс, к-сть винятків) повного першого прогону сторінки в чистому процесі"""
+    result = subprocess.run(
+        [sys.executable, "-c", FULL_RUN_SCRIPT, page],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    ms, errors = result.stdout.strip().splitlines()[-1].split()
+    return float(ms), int(errors)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Час імпорту залежностей для кожної сторінки")
+    parser.add_argument("--top", type=int, default=3, help="Скільки найважчих модулів показати")
+    parser.add_argument("--full", action="store_true", help="Також виміряти повний перший прогін сторінки")
+    args = parser.parse_args(argv)
+
+    baseline, _ = measure(["pass"])
+    for page in PAGES:
+        try:
+            imports = top_level_imports(page)
+            total, modules = measure(imports)
+            with_db, _ = measure(imports + FIRST_DB_CALL_IMPORTS)
+        except RuntimeError as e:
+            print(f"{page:<22} помилка: {e}")
+            continue
+        heaviest = ", ".join(f"{name} {ms:.0f}" for ms, name in modules[:args.top])
+        line = f"{page:<22} {total - baseline:8.1f} ms  +БД {with_db - baseline:8.1f} ms"
+        if args.full:
+            try:
+                run_ms, errors = measure_full_run(page)
+                line += f"  прогін {run_ms:8.1f} ms" + (f" (винятків: {errors})" if errors else "")
+            except RuntimeError as e:
+                line += f"  прогін: помилка {e}"
+        print(f"{line}  ({heaviest})")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
 import json
-from google import genai
 import streamlit as st
+from utils.text_sampling import representative_sample, format_sample
 
-def get_client():
-    api_key = None
+# Скільки репрезентативних відповідей відправляємо в модель
+TEXT_SAMPLE_LIMIT = 60
+BATCH_TEXT_SAMPLE_LIMIT = 40
+
+def get_api_key():
     if "gemini" in st.secrets and "GEMINI_API_KEY" in st.secrets["gemini"]:
-        api_key = st.secrets["gemini"]["GEMINI_API_KEY"]
-    elif "GEMINI_API_KEY" in st.secrets:
-        api_key = st.secrets["GEMINI_API_KEY"]
-    
+        return st.secrets["gemini"]["GEMINI_API_KEY"]
+    if "GEMINI_API_KEY" in st.secrets:
+        return st.secrets["GEMINI_API_KEY"]
+    return None
+
+def get_client():
+    api_key = get_api_key()
     if not api_key: return None
+
+    # SDK важкий — імпортуємо лише при першому зверненні до AI
+    from google import genai
     return genai.Client(api_key=api_key)
 
 def get_ai_analysis(question_text, data, data_type="stats"):
@@ -21,7 +30,8 @@ def get_ai_analysis(question_text, data, data_type="stats"):
         
         prompt = ""
         if data_type == "text":
-            prompt = f"{base_prompt} Проаналізуй відповіді: '{question_text}'. Список: {str(data[:60])}. Виділи теми та настрій."
+            sample = format_sample(representative_sample(data, TEXT_SAMPLE_LIMIT))
+            prompt = f"{base_prompt} Проаналізуй відповіді: '{question_text}'. Всього відповідей: {len(data)}, нижче — репрезентативні, у дужках (×N) — скільки схожих. Список: {sample}. Виділи теми та настрій."
         else:
             prompt = f"{base_prompt} Проаналізуй статистику: '{question_text}'. Дані: {data}. Опишіть лідерів та розподіл."
 
@@ -34,11 +44,12 @@ def get_ai_analysis(question_text, data, data_type="stats"):
         return f"Помилка AI: {e}"
 
 def analyze_whole_survey(survey_title, questions_list):
+    """Висновки для всіх питань одним запитом. Виконується у фоновій задачі, тож помилки
+    не показуються в UI, а піднімаються далі — їх зберігає задача (utils/jobs.py)"""
+    client = get_client()
+    if not client: raise RuntimeError("Не знайдено API ключа")
 
     try:
-        client = get_client()
-        if not client: return None
-
         context_data = []
         for idx, q in enumerate(questions_list):
             q_text = q.get('text')
@@ -46,7 +57,9 @@ def analyze_whole_survey(survey_title, questions_list):
 
             content = ""
             if q.get('type') == 'text' and isinstance(q_data, dict):
-                content = str(q_data.get('answers', [])[:40]) 
+                answers = q_data.get('answers', [])
+                sample = format_sample(representative_sample(answers, BATCH_TEXT_SAMPLE_LIMIT))
+                content = f"{len(answers)} відповідей, репрезентативні (×N — схожих): {sample}"
             else:
                 content = str(q_data)
                 
@@ -91,8 +104,7 @@ def analyze_whole_survey(survey_title, questions_list):
         return filtered_result if filtered_result else None
 
     except Exception as e:
-        st.error(f"Batch Error: {e}")
-        return None
+        raise RuntimeError(f"Batch Error: {e}") from e
 
 
 def generate_survey_description(survey_title, questions_list):
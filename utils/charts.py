@@ -0,0 +1,138 @@
+import re
+import textwrap
+import pandas as pd
+
+def extract_rating_number(series):
+    return series.astype(str).apply(lambda x: int(x.split()[0]) if x.split()[0].isdigit() else 0)
+
+def smart_wrap(text, width=30):
+    if pd.isna(text): return ""
+    text = str(text)
+    if len(text) > 120: text = text[:117] + "..."
+    return "<br>".join(textwrap.wrap(text, width=width))
+
+def calculate_chart_height(df, base_height=350, row_height=45):
+    if df.empty: return base_height
+    dynamic_height = base_height + (len(df) * row_height)
+    return dynamic_height
+
+def generate_insight(df, question_type):
+    if df.empty: return "Немає даних", "error", "-", 0
+    if question_type == 'text': return f"Отримано {len(df)} відповідей.", "info", str(len(df)), 0
+    if question_type == 'matrix': return "Матричне питання.", "info", "Matrix", 0
+
+    sorted_df = df.sort_values(by='Кількість', ascending=False)
+    winner = sorted_df.iloc[0]
+    total = df['Кількість'].sum()
+    if total == 0: return "Err", "error", "-", 0
+
+    percent = (winner['Кількість'] / total) * 100
+
+    if question_type == 'rating':
+        try:
+            vals = extract_rating_number(df['Відповідь'])
+            avg = (vals * df['Кількість']).sum() / total
+            status = "success" if avg >= 4 else "warning"
+            return f"Середня: **{avg:.1f}**", status, f"{avg:.1f}", avg*20
+        except: return "Помилка", "warning", "-", 0
+
+    return f"Лідер: **{winner['Відповідь'][:20]}...**", "success", str(winner['Кількість']), percent
+
+def clean_question_title(text):
+    return re.sub(r'^\d+[\.\)\-\s]+\s*', '', text)
+
+def question_frame(q_type, q_data):
+    if q_type == 'text':
+        data_list = q_data.get("answers", []) if isinstance(q_data, dict) else []
+        return pd.DataFrame(data_list, columns=['Text'])
+    if q_type == 'matrix':
+        return pd.DataFrame()
+    df = pd.DataFrame(list(q_data.items()), columns=['Відповідь', 'Кількість'])
+    df['Label'] = df['Відповідь'].apply(lambda x: smart_wrap(x, 30))
+    return df
+
+def build_figure(df, q_type, q_data):
+    """Plotly-фігура для питання або None (текстові питання)"""
+    if q_type == 'text':
+        return None
+
+    # Plotly імпортується лише коли на сторінці є графік
+    import plotly.express as px
+
+    if q_type == 'matrix':
+        matrix_rows = []
+        for sub_q, sub_votes in q_data.items():
+            tot = sum(sub_votes.values())
+            for ans, cnt in sub_votes.items():
+                pct = (cnt / tot * 100) if tot > 0 else 0
+                matrix_rows.append({
+                    "Питання": smart_wrap(sub_q, 25),
+                    "Відповідь": ans,
+                    "Кількість": cnt,
+                    "Відсоток": pct
+                })
+        df_m = pd.DataFrame(matrix_rows)
+        if df_m.empty: return None
+        h = calculate_chart_height(df_m, base_height=400, row_height=50)
+        fig = px.bar(df_m, x="Відсоток", y="Питання", color="Відповідь",
+                     orientation='h', text_auto='.0f')
+        fig.update_layout(
+            height=h,
+            legend=dict(orientation="h", y=-0.2, x=0),
+            margin=dict(t=20, b=50),
+            xaxis_fixedrange=True,
+            yaxis_fixedrange=True,
+            yaxis=dict(automargin=True, title=None),
+            xaxis=dict(title=None),
+            dragmode=False
+        )
+        return fig
+
+    if q_type == 'multiple_choice':
+        df = df.sort_values('Кількість')
+        h = calculate_chart_height(df, base_height=350, row_height=45)
+        fig = px.bar(df, x='Кількість', y='Label', orientation='h', text='Кількість')
+        fig.update_layout(
+            showlegend=False,
+            height=h,
+            margin=dict(t=30, b=20),
+            xaxis_fixedrange=True,
+            yaxis_fixedrange=True,
+            yaxis=dict(automargin=True, title=None),
+            xaxis=dict(title=None),
+            dragmode=False
+        )
+        return fig
+
+    if q_type == 'single_choice':
+        fig = px.pie(df, values='Кількість', names='Label', hole=0.4)
+        fig.update_layout(
+            legend=dict(orientation="h", y=-0.2, x=0),
+            height=450,
+            margin=dict(l=10, r=10, t=30, b=80),
+            dragmode=False
+        )
+        return fig
+
+    if q_type == 'rating':
+        fig = px.bar(df, x='Label', y='Кількість', color='Кількість')
+        fig.update_layout(
+            showlegend=False,
+            height=400,
+            margin=dict(l=20, r=0, t=20, b=80),
+            xaxis_fixedrange=True,
+            yaxis_fixedrange=True,
+            xaxis=dict(tickangle=-45, automargin=True, title=None),
+            yaxis=dict(title=None),
+            dragmode=False
+        )
+        return fig
+
+    return None
+
+def ai_input(df, q_type, q_data):
+    """Дані та тип для get_ai_analysis. Текстові відповіді не копіюються в знімок:
+    дашборд читає їх з БД лише після натискання кнопки аналізу"""
+    if q_type == 'text': return None, 'text'
+    if q_type == 'matrix': return str(q_data), 'matrix'
+    return dict(zip(df['Відповідь'], df['Кількість'].astype(int))), q_type
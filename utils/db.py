@@ -1,32 +1,182 @@
+import importlib.util
 import streamlit as st
-from pymongo import MongoClient
-from bson.objectid import ObjectId
+
+# Значення за замовчуванням; кожне можна перевизначити в секції [mongo] secrets.toml
+CONNECTION_DEFAULTS = {
+    "max_pool_size": 50,
+    "min_pool_size": 0,
+    "max_idle_time_ms": 60000,
+    "server_selection_timeout_ms": 5000,
+    "connect_timeout_ms": 5000,
+    "socket_timeout_ms": 30000,
+    # Стиснення трафіку: перший доступний з обох боків алгоритм; zlib є завжди
+    "compressors": ["zstd", "snappy", "zlib"],
+    # Наскільки може відставати репліка для читань дашборду (MongoDB вимагає >= 90)
+    "max_staleness_seconds": 120,
+}
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy"}
+
+@st.cache_resource
+def get_connection_settings():
+    """Рахується раз на процес: secrets та наявність модулів стиснення не змінюються між запитами"""
+    settings = {**CONNECTION_DEFAULTS, **{k: v for k, v in st.secrets["mongo"].items() if k in CONNECTION_DEFAULTS}}
+    compressors = settings["compressors"]
+    # У secrets можна вказати і список, і рядок "zstd,snappy"
+    if isinstance(compressors, str):
+        compressors = compressors.split(",")
+    settings["compressors"] = [
+        c for c in (c.strip() for c in compressors)
+        if c and (c not in _COMPRESSOR_MODULES or importlib.util.find_spec(_COMPRESSOR_MODULES[c]))
+    ]
+    return settings
 
 @st.cache_resource
 def init_connection():
+    from pymongo import MongoClient
     uri = st.secrets["mongo"]["uri"]
-    return MongoClient(uri)
+    settings = get_connection_settings()
+    return MongoClient(
+        uri,
+        maxPoolSize=settings["max_pool_size"],
+        minPoolSize=settings["min_pool_size"],
+        maxIdleTimeMS=settings["max_idle_time_ms"],
+        serverSelectionTimeoutMS=settings["server_selection_timeout_ms"],
+        connectTimeoutMS=settings["connect_timeout_ms"],
+        socketTimeoutMS=settings["socket_timeout_ms"],
+        compressors=",".join(settings["compressors"]),
+    )
+
+@st.cache_resource
+def _read_only_db():
+    from pymongo.read_preferences import SecondaryPreferred
+    max_staleness = get_connection_settings()["max_staleness_seconds"]
+    return init_connection().get_database(
+        st.secrets["mongo"]["db_name"], read_preference=SecondaryPreferred(max_staleness=max_staleness)
+    )
+
+def get_db(read_only=False):
+    """read_only=True — публічні читання (стрічка, дашборд) ідуть на вторинні вузли
+    з обмеженим відставанням; записи та адмінські читання лишаються на primary"""
+    if read_only:
+        return _read_only_db()
+    return init_connection()[st.secrets["mongo"]["db_name"]]
+
+# Метадані опитування живуть у `surveys`, а питання — окремими документами в `questions`
+# з індексом (survey_id, index). Так документ опитування не впирається в ліміт 16 MB,
+# а запис AI-висновку змінює лише маленький документ питання.
+# Старі опитування з вбудованим масивом `questions` читаються як і раніше (див. migrate_questions.py).
+
+def split_survey(survey):
+    """Документ опитування без питань + список документів питань"""
+    meta = {k: v for k, v in survey.items() if k != "questions"}
+    questions = survey.get("questions", [])
+    meta["question_count"] = len(questions)
+    docs = [{**q, "survey_id": survey["id"], "index": i} for i, q in enumerate(questions)]
+    return meta, docs
+
+def next_survey_ids(count):
+    """Діапазон нових id з атомарного лічильника; стартує після найбільшого наявного id"""
+    from pymongo import ReturnDocument
+    db = get_db()
+    if not db.counters.find_one({"_id": "survey_id"}, {"_id": 1}):
+        last = db.surveys.find_one({"id": {"$type": "number"}}, {"_id": 0, "id": 1}, sort=[("id", -1)])
+        db.counters.update_one({"_id": "survey_id"}, {"$max": {"seq": last["id"] if last else 0}}, upsert=True)
+    counter = db.counters.find_one_and_update(
+        {"_id": "survey_id"}, {"$inc": {"seq": count}}, return_document=ReturnDocument.AFTER
+    )
+    return range(counter["seq"] - count + 1, counter["seq"] + 1)
+
+def insert_surveys(surveys):
+    """Призначає опитуванням id (змінює передані словники) і записує їх. Спершу метадані,
+    потім питання; якщо вставка питань не вдалася, прибирається вся партія"""
+    db = get_db()
+    db.questions.create_index([("survey_id", 1), ("index", 1)], unique=True)
+    for survey, survey_id in zip(surveys, next_survey_ids(len(surveys))):
+        survey["id"] = survey_id
 
-def get_db():
-    client = init_connection()
-    db_name = st.secrets["mongo"]["db_name"]
-    return client[db_name]
+    metas, question_docs = [], []
+    for survey in surveys:
+        meta, docs = split_survey(survey)
+        metas.append(meta)
+        question_docs.extend(docs)
 
-def get_all_surveys():
+    survey_ids = [meta["id"] for meta in metas]
+    try:
+        db.surveys.insert_many(metas)
+        if question_docs:
+            db.questions.insert_many(question_docs)
+    except Exception:
+        db.questions.delete_many({"survey_id": {"$in": survey_ids}})
+        db.surveys.delete_many({"id": {"$in": survey_ids}})
+        raise
+
+def insert_survey(survey):
+    insert_surveys([survey])
+
+def delete_survey_questions(survey_id):
+    db = get_db()
+    db.questions.delete_many({"survey_id": survey_id})
+
+def get_all_surveys(read_only=False):
+    db = get_db(read_only)
+    return list(db.surveys.find({}, {"_id": 0, "questions": 0}))
+
+def get_questions(survey_id, start=0, limit=0, fields=None, read_only=False):
+    """Питання опитування за діапазоном індексів; `fields` — проєкція (напр. ["text", "type"])"""
+    db = get_db(read_only)
+    projection = {"_id": 0, "survey_id": 0}
+    if fields:
+        projection = {"_id": 0, "index": 1, **{f: 1 for f in fields}}
+
+    cursor = db.questions.find({"survey_id": survey_id, "index": {"$gte": start}}, projection).sort("index", 1)
+    questions = list(cursor.limit(limit) if limit else cursor)
+    if questions:
+        return questions
+
+    # Старий формат: питання вбудовані в документ опитування
+    legacy = db.surveys.find_one(
+        {"id": survey_id, "questions": {"$exists": True}},
+        {"_id": 0, "questions": {"$slice": [start, limit or 10 ** 6]}}
+    )
+    if not legacy:
+        return []
+    return [
+        {"index": start + i, **({f: q.get(f) for f in fields} if fields else q)}
+        for i, q in enumerate(legacy["questions"])
+    ]
+
+def get_survey_by_id(survey_id, with_questions=True, read_only=False):
+    db = get_db(read_only)
+    survey = db.surveys.find_one({"id": survey_id}, {"_id": 0, "questions": 0})
+    if survey and with_questions:
+        survey["questions"] = get_questions(survey_id, read_only=read_only)
+    return survey
+
+def get_survey_version(survey_id, read_only=False):
+    db = get_db(read_only)
+    doc = db.surveys.find_one({"id": survey_id}, {"_id": 0, "version": 1})
+    return doc.get("version", 0) if doc else None
+
+def find_import(fingerprint):
     db = get_db()
-    return list(db.surveys.find({}, {"_id": 0}))
+    return db.imports.find_one({"fingerprint": fingerprint}, {"_id": 0})
 
-def get_survey_by_id(survey_id):
+def save_import(fingerprint, record):
+    """Кешує результат обробки файлу (типи, агрегати, AI-опис) за відбитком вмісту"""
     db = get_db()
-    return db.surveys.find_one({"id": survey_id}, {"_id": 0})
+    db.imports.create_index("fingerprint", unique=True)
+    db.imports.update_one({"fingerprint": fingerprint}, {"$set": record}, upsert=True)
 
 def save_ai_result(survey_id, question_index, analysis_text):
     db = get_db()
-    
-    # MongoDB дозволяє звертатися до елементів масиву через крапку: questions.0.ai_analysis
-    key = f"questions.{question_index}.ai_analysis"
-    
-    db.surveys.update_one(
-        {"id": survey_id}, # Знаходимо опитування за ID
-        {"$set": {key: analysis_text}} # Записуємо текст
-    )
\ No newline at end of file
+
+    result = db.questions.update_one(
+        {"survey_id": survey_id, "index": question_index},
+        {"$set": {"ai_analysis": analysis_text}}
+    )
+    if result.matched_count == 0:
+        # Старий формат: questions.0.ai_analysis всередині документа опитування
+        key = f"questions.{question_index}.ai_analysis"
+        db.surveys.update_one({"id": survey_id}, {"$set": {key: analysis_text}})
+
+    db.surveys.update_one({"id": survey_id}, {"$inc": {"version": 1}})
@@ -0,0 +1,219 @@
+import hashlib
+import re
+import pandas as pd
+
+QUESTION_TYPES = ["single_choice", "multiple_choice", "text", "rating"]
+MATRIX_TYPE = "matrix"
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xls")
+STOP_WORDS = ["timestamp", "email", "name", "піб", "пошта"]
+GARBAGE = ["", "-", "—", "–", "_", ".", "?", "!", "n/a", "nan", "null", "none", "немає", "не знаю", "no"]
+# Google Forms експортує сітку як окремі колонки "Питання [Рядок]"
+GRID_PATTERN = re.compile(r'^(.+?)\s*\[(.+)\]\s*$')
+
+# === ОЧИЩЕННЯ ТЕКСТУ ===
+def clean_question_text(text):
+    """Видаляє нумерацію на початку (наприклад '1. ', '2) ', '1 - ')"""
+    if pd.isna(text): return "Без назви"
+    text = str(text).strip()
+    return re.sub(r'^\d+[\.\)\-\s]+\s*', '', text)
+
+def normalize_text(text):
+    if pd.isna(text): return None
+    text = str(text).strip()
+    if text.lower() in GARBAGE: return None
+    return " ".join(text.split())
+
+def smart_split(text, delimiter=','):
+    if not isinstance(text, str): return [text]
+    pattern = r',\s*(?![^()]*\))'
+    parts = text.split(';') if delimiter == ';' else re.split(pattern, text)
+    return [normalize_text(p) for p in parts if normalize_text(p)]
+
+# === ВИЗНАЧЕННЯ ТИПІВ ===
+def detect_type(series):
+    clean_series = series.apply(normalize_text).dropna()
+    if clean_series.empty: return "text"
+
+    total_rows = len(clean_series)
+    unique_vals = clean_series.nunique()
+    avg_len = clean_series.astype(str).map(len).mean()
+
+    cnt_semicolon = clean_series.str.contains(';', regex=False).sum()
+    if cnt_semicolon >= 1:
+        return "multiple_choice"
+
+    counts = clean_series.value_counts()
+    try:
+        first_chars = [str(k).split()[0] for k in counts.keys()]
+        if all(c.isdigit() and 0 <= int(c) <= 10 for c in first_chars) and len(counts) <= 12:
+            return "rating"
+    except: pass
+
+    if (unique_vals > 50 and (unique_vals / total_rows) > 0.8) or avg_len > 80:
+        return "text"
+
+    return "single_choice"
+
+def format_data_for_type(series, selected_type):
+    clean_series = series.apply(normalize_text).dropna()
+    if selected_type == "text":
+        # Зберігаються всі відповіді: розмір промпту обмежує вибірка в utils/text_sampling.py
+        return {"answers": clean_series.tolist()}
+
+    if selected_type == "multiple_choice":
+        cnt_semicolon = clean_series.str.contains(';', regex=False).sum()
+        delimiter = ';' if cnt_semicolon > 0 else ','
+        expanded_list = []
+        for item in clean_series:
+            expanded_list.extend(smart_split(item, delimiter))
+        counts = pd.Series(expanded_list).value_counts()
+    else:
+        counts = clean_series.value_counts()
+
+    return counts.head(50).to_dict()
+
+# === МАТРИЧНІ ПИТАННЯ (СІТКИ) ===
+def group_questions(columns):
+    """{питання: [колонки]} у порядку появи; колонки сітки однієї родини об'єднуються.
+    До родини потрапляють лише колонки виду "Питання [Рядок]"; звичайна колонка з тим самим
+    текстом лишається окремим питанням, а сітка тоді отримує ключ «Питання (сітка)»"""
+    columns = list(columns)
+    families = {}
+    for col in columns:
+        match = GRID_PATTERN.match(col)
+        if match: families.setdefault(match.group(1), []).append(col)
+
+    groups = {}
+    for col in columns:
+        match = GRID_PATTERN.match(col)
+        family = families[match.group(1)] if match else None
+        if not family or len(family) == 1:
+            # Одна колонка з дужками — звичайне питання, а не сітка
+            groups[col] = [col]
+        elif col == family[0]:
+            text = match.group(1)
+            groups[f"{text} (сітка)" if text in columns else text] = family
+    return groups
+
+def grid_column_overrides(columns, types):
+    """{колонка: сітка} для типів, заданих окремим колонкам сітки — тип задається сітці цілком"""
+    return {
+        col: text
+        for text, cols in group_questions(columns).items() if len(cols) > 1
+        for col in cols if col in types
+    }
+
+def format_matrix(df, columns):
+    """Одна векторизована агрегація melt + crosstab: {рядок: {відповідь: кількість}}"""
+    rows = {col: GRID_PATTERN.match(col).group(2).strip() for col in columns}
+    melted = df[columns].rename(columns=rows).melt(var_name="row", value_name="answer")
+
+    # Сітки з прапорцями містять кілька відповідей через ';'
+    melted = melted.dropna(subset=["answer"])
+    melted = melted.assign(answer=melted["answer"].astype(str).str.split(";")).explode("answer", ignore_index=True)
+    melted["answer"] = melted["answer"].str.split().str.join(" ")
+    melted = melted[melted["answer"].notna() & ~melted["answer"].str.lower().isin(GARBAGE)]
+    if melted.empty: return {}
+
+    table = pd.crosstab(melted["row"], melted["answer"])
+    table = table.reindex(index=[r for r in rows.values() if r in table.index], columns=melted["answer"].unique())
+    return {
+        row: {ans: int(cnt) for ans, cnt in counts.items() if cnt > 0}
+        for row, counts in table.iterrows()
+    }
+
+def build_matrix_question(df, text, columns):
+    return {"text": text, "type": MATRIX_TYPE, "data": format_matrix(df, columns)}
+
+# === ФАЙЛИ ТА ДОКУМЕНТ ОПИТУВАННЯ ===
+def file_fingerprint(content, filename):
+    """SHA-256 вмісту файлу. CSV нормалізується (BOM, переноси рядків, пробіли в кінці),
+    щоб той самий експорт з іншої ОС давав той самий відбиток"""
+    if filename.lower().endswith('.csv'):
+        text = content.decode('utf-8-sig', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+        lines = [line.rstrip() for line in text.split('\n')]
+        content = '\n'.join(lines).strip('\n').encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+def read_survey_file(source, filename=None):
+    """Зчитує CSV/Excel (шлях або файл-об'єкт) та очищує назви колонок"""
+    name = filename or str(source)
+    if name.lower().endswith('.csv'):
+        df = pd.read_csv(source)
+    else:
+        df = pd.read_excel(source)
+    df.columns = [clean_question_text(col) for col in df.columns]
+    return df
+
+def title_from_filename(filename):
+    clean_filename = filename
+    for ext in SUPPORTED_EXTENSIONS:
+        clean_filename = clean_filename.replace(ext, "")
+    return clean_filename
+
+def default_drop_columns(columns):
+    return [c for c in columns if any(sw in c.lower() for sw in STOP_WORDS)]
+
+def suggest_types(df, known_types=None):
+    """Типи для питань (див. group_questions); відомі (з кешу імпорту чи конфігу) не визначаються повторно"""
+    known_types = known_types or {}
+    return {
+        text: known_types.get(text) or (MATRIX_TYPE if len(cols) > 1 else detect_type(df[cols[0]]))
+        for text, cols in group_questions(df.columns).items()
+    }
+
+def column_examples(df, width=60):
+    """Перша непорожня відповідь кожної колонки — підказка на кроці перевірки типів"""
+    examples = {}
+    for col in df.columns:
+        values = df[col].dropna()
+        examples[col] = str(values.iloc[0])[:width] if len(values) else None
+    return examples
+
+def build_question(series, selected_type):
+    return {
+        "text": series.name,
+        "type": selected_type,
+        "data": format_data_for_type(series, selected_type)
+    }
+
+def build_group_questions(df, text, columns, selected_type):
+    """Сітка як одне матричне питання, або (якщо обрано інший тип) — по питанню на колонку"""
+    if selected_type == MATRIX_TYPE:
+        return [build_matrix_question(df, text, columns)]
+    return [build_question(df[col], selected_type) for col in columns]
+
+def build_questions(df, types):
+    """Питання для груп, що є в `types`; решта колонок вважається видаленою при імпорті"""
+    questions = []
+    for text, cols in group_questions(df.columns).items():
+        if text in types:
+            questions.extend(build_group_questions(df, text, cols, types[text]))
+    return questions
+
+def build_import_record(survey, filename, types):
+    """Запис кешу імпорту: типи й AI-опис, щоб відновити опитування з файлу без ручного
+    налаштування та AI. Самі дані питань не дублюються — вони живуть у колекції `questions`"""
+    return {
+        "survey_id": survey["id"],
+        "filename": filename,
+        "title": survey["title"],
+        "organization": survey["organization"],
+        "participants": survey["participants"],
+        "date": survey["date"],
+        "types": types,
+        "question_texts": [q["text"] for q in survey["questions"]],
+        "ai_description": survey.get("ai_description")
+    }
+
+def build_survey(title, organization, participants, questions):
+    now = pd.Timestamp.now()
+    return {
+        # Унікальний id видає лічильник у БД під час вставки (utils/db.py: insert_surveys)
+        "id": None,
+        "title": title,
+        "organization": organization,
+        "participants": participants,
+        "date": now.strftime("%Y-%m-%d"),
+        "questions": questions
+    }
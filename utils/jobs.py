@@ -0,0 +1,149 @@
+"""Фонові задачі для повільних AI-викликів.
+
+Задача — документ у колекції `jobs` (статус, прогрес, результат). Виконує її пул потоків,
+спільний для всіх сесій процесу, тож закриття вкладки чи rerun не переривають роботу,
+а UI лише опитує статус. AI-виклики — це очікування мережі, тому потоків достатньо.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import streamlit as st
+from utils.db import get_db, get_survey_by_id, get_questions, save_ai_result
+
+ACTIVE_STATUSES = ["queued", "running"]
+# Задача в статусі running без оновлень довше за цей час вважається покинутою (процес впав)
+STALE_AFTER = timedelta(minutes=10)
+
+def _now():
+    return datetime.now()
+
+def _update(job_id, **fields):
+    get_db().jobs.update_one({"job_id": job_id}, {"$set": {**fields, "updated_at": _now()}})
+
+# === ОБРОБНИКИ ===
+def _survey_description(params, report):
+    from utils.ai_helper import generate_survey_description
+    from utils.snapshot import refresh_snapshot
+    survey_id = params["survey_id"]
+    survey = get_survey_by_id(survey_id, with_questions=False)
+    report(0.1, "Генерація опису...")
+    description = generate_survey_description(survey["title"], get_questions(survey_id, fields=["text"]))
+    if not description:
+        raise RuntimeError("AI не повернув опис")
+
+    db = get_db()
+    db.surveys.update_one({"id": survey_id}, {"$set": {"ai_description": description}, "$inc": {"version": 1}})
+    # Кеш імпорту теж отримує опис, щоб повторне завантаження файлу його перевикористало
+    db.imports.update_one({"survey_id": survey_id}, {"$set": {"ai_description": description}})
+    refresh_snapshot(survey_id)
+    return description
+
+def _survey_analysis(params, report):
+    from utils.ai_helper import analyze_whole_survey
+    from utils.snapshot import refresh_snapshot
+    survey_id = params["survey_id"]
+    survey = get_survey_by_id(survey_id)
+    report(0.1, "Gemini аналізує все опитування...")
+    batch_results = analyze_whole_survey(survey.get('title'), survey.get('questions', []))
+    if not batch_results:
+        raise RuntimeError("Модель не повернула жодного висновку")
+
+    for done, (idx, text) in enumerate(batch_results.items(), start=1):
+        save_ai_result(survey_id, int(idx), text)
+        report(0.1 + 0.9 * done / len(batch_results), f"Збережено {done}/{len(batch_results)}")
+    refresh_snapshot(survey_id)
+    return len(batch_results)
+
+JOB_HANDLERS = {
+    "survey_description": _survey_description,
+    "survey_analysis": _survey_analysis,
+}
+
+# === ВИКОНАННЯ ===
+def _run(job_id):
+    db = get_db()
+    # Атомарне захоплення: задачу виконує лише один воркер (навіть між репліками)
+    job = db.jobs.find_one_and_update(
+        {"job_id": job_id, "status": "queued"},
+        {"$set": {"status": "running", "started_at": _now(), "updated_at": _now()}}
+    )
+    if not job: return
+
+    def report(progress, message=""):
+        _update(job_id, progress=progress, message=message)
+
+    try:
+        result = JOB_HANDLERS[job["kind"]](job["params"], report)
+        _update(job_id, status="done", progress=1.0, message="Готово", result=result)
+    except Exception as e:
+        _update(job_id, status="failed", error=str(e), message=f"Помилка: {e}")
+
+@st.cache_resource
+def get_executor():
+    """Один пул на процес; при старті підхоплює задачі, що лишилися з попереднього запуску"""
+    workers = st.secrets.get("jobs", {}).get("workers", 2)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="youthpulse-job")
+
+    db = get_db()
+    db.jobs.create_index("job_id", unique=True)
+    db.jobs.create_index([("kind", 1), ("params.survey_id", 1), ("status", 1)])
+    _resubmit_orphaned(executor)
+    return executor
+
+def _resubmit_orphaned(executor):
+    db = get_db()
+    db.jobs.update_many(
+        {"status": "running", "updated_at": {"$lt": _now() - STALE_AFTER}},
+        {"$set": {"status": "queued", "updated_at": _now()}}
+    )
+    # Повторна подача безпечна: _run захоплює задачу атомарно, дублікат просто нічого не робить
+    for job in db.jobs.find({"status": "queued"}, {"job_id": 1}):
+        executor.submit(_run, job["job_id"])
+
+def recover_jobs():
+    """Повертає в роботу задачі, покинуті процесом, що впав чи перезапустився"""
+    executor = get_executor()
+    _resubmit_orphaned(executor)
+
+def find_active_job(kind, survey_id):
+    """Активна задача; якщо вона давно не оновлювалась (процес перезапущено), спершу відновлюється —
+    інакше сторінка вічно показувала б прогрес задачі, яку ніхто не виконує"""
+    query = {"kind": kind, "params.survey_id": survey_id, "status": {"$in": ACTIVE_STATUSES}}
+    job = get_db().jobs.find_one(query, {"_id": 0})
+    if job and job.get("updated_at") and job["updated_at"] < _now() - STALE_AFTER:
+        recover_jobs()
+        job = get_db().jobs.find_one(query, {"_id": 0})
+    return job
+
+def get_job(job_id):
+    return get_db().jobs.find_one({"job_id": job_id}, {"_id": 0})
+
+def submit_job(kind, params):
+    """Ставить задачу в чергу і одразу повертає її id; дублікат активної задачі не створюється"""
+    if "survey_id" in params:
+        active = find_active_job(kind, params["survey_id"])
+        if active: return active["job_id"]
+
+    job_id = uuid.uuid4().hex
+    get_db().jobs.insert_one({
+        "job_id": job_id,
+        "kind": kind,
+        "params": params,
+        "status": "queued",
+        "progress": 0.0,
+        "message": "У черзі",
+        "created_at": _now(),
+        "updated_at": _now()
+    })
+    get_executor().submit(_run, job_id)
+    return job_id
+
+# === UI ===
+@st.fragment(run_every="2s")
+def poll_job(job_id, label):
+    """Прогрес задачі, що оновлюється без перезапуску сторінки; після завершення — rerun"""
+    job = get_job(job_id)
+    if job and job["status"] in ACTIVE_STATUSES:
+        st.progress(job.get("progress", 0.0), text=f"{label}: {job.get('message', '')}")
+        return
+    st.rerun()
@@ -0,0 +1,128 @@
+"""Порівняння хвиль опитування (однакова анкета в різні семестри).
+
+Опитування з однаковим полем `series` утворюють серію; хвилі впорядковані за датою.
+Частки відповідей, зміни між хвилями та нахил тренду рахує агрегаційний конвеєр MongoDB
+по колекції `questions`, а результат кешується за версіями всіх хвиль.
+"""
+import streamlit as st
+from utils.db import get_db
+
+COMPARABLE_TYPES = ["single_choice", "multiple_choice", "rating"]
+
+def get_series_names():
+    return sorted(n for n in get_db(read_only=True).surveys.distinct("series") if n)
+
+def get_series_waves(series):
+    """Хвилі серії; `legacy` — питання ще вбудовані в документ опитування (до migrate_questions.py)
+    і в агрегацію по колекції `questions` не потрапляють"""
+    db = get_db(read_only=True)
+    waves = list(db.surveys.find(
+        {"series": series},
+        {"_id": 0, "id": 1, "title": 1, "date": 1, "participants": 1, "version": 1}
+    ).sort([("date", 1), ("id", 1)]))
+    legacy = set(db.surveys.distinct("id", {"series": series, "questions": {"$exists": True}}))
+    for wave in waves:
+        wave["legacy"] = wave["id"] in legacy
+    return waves
+
+def comparison_pipeline(survey_ids):
+    """Питання зіставляються за текстом; для кожної відповіді — частка в кожній хвилі,
+    зміна відносно попередньої хвилі, зміна перша→остання та нахил лінійного тренду (п.п./хвилю).
+    Хвиля, де питання було, а варіанта не обрав ніхто, рахується як 0%; хвилі, де питання
+    не ставилося, не входять ні в зміни, ні в тренд"""
+    # Запис хвилі $$w з масиву $found або нульовий, якщо варіанта в цій хвилі немає
+    wave_or_zero = {"$let": {
+        "vars": {"pos": {"$indexOfArray": ["$found.wave", "$$w"]}},
+        "in": {"$cond": [
+            {"$lt": ["$$pos", 0]},
+            {"wave": "$$w", "count": 0, "share": 0},
+            {"$arrayElemAt": ["$found", "$$pos"]}
+        ]}
+    }}
+    delta_to_previous = {"$cond": [
+        {"$eq": ["$$i", 0]}, 0,
+        {"$subtract": [
+            {"$arrayElemAt": ["$waves.share", "$$i"]},
+            {"$arrayElemAt": ["$waves.share", {"$subtract": ["$$i", 1]}]}
+        ]}
+    ]}
+    linear_slope = {"$let": {
+        "vars": {"den": {"$subtract": [{"$multiply": ["$n", "$sxx"]}, {"$multiply": ["$sx", "$sx"]}]}},
+        "in": {"$cond": [
+            {"$eq": ["$$den", 0]}, 0,
+            {"$divide": [{"$subtract": [{"$multiply": ["$n", "$sxy"]}, {"$multiply": ["$sx", "$sy"]}]}, "$$den"]}
+        ]}
+    }}
+
+    return [
+        {"$match": {"survey_id": {"$in": survey_ids}, "type": {"$in": COMPARABLE_TYPES}}},
+        {"$project": {
+            "_id": 0, "text": 1, "type": 1, "index": 1,
+            "wave": {"$indexOfArray": [survey_ids, "$survey_id"]},
+            "answers": {"$objectToArray": "$data"}
+        }},
+        {"$set": {"total": {"$sum": "$answers.v"}}},
+        # Хвилі, в яких питання ставилося (до розгортання відповідей)
+        {"$setWindowFields": {
+            "partitionBy": "$text",
+            "output": {"question_waves": {"$addToSet": "$wave", "window": {"documents": ["unbounded", "unbounded"]}}}
+        }},
+        {"$unwind": "$answers"},
+        {"$group": {
+            "_id": {"text": "$text", "answer": "$answers.k"},
+            "type": {"$first": "$type"},
+            "index": {"$min": "$index"},
+            "question_waves": {"$first": "$question_waves"},
+            "found": {"$push": {
+                "wave": "$wave",
+                "count": "$answers.v",
+                "share": {"$cond": [
+                    {"$gt": ["$total", 0]},
+                    {"$multiply": [{"$divide": ["$answers.v", "$total"]}, 100]},
+                    0
+                ]}
+            }}
+        }},
+        {"$set": {"question_waves": {"$sortArray": {"input": "$question_waves", "sortBy": 1}}}},
+        {"$set": {"waves": {"$map": {"input": "$question_waves", "as": "w", "in": wave_or_zero}}}},
+        {"$set": {"waves": {"$map": {
+            "input": {"$range": [0, {"$size": "$waves"}]},
+            "as": "i",
+            "in": {"$mergeObjects": [{"$arrayElemAt": ["$waves", "$$i"]}, {"delta": delta_to_previous}]}
+        }}}},
+        {"$set": {
+            "n": {"$size": "$waves"},
+            "sx": {"$sum": "$waves.wave"},
+            "sy": {"$sum": "$waves.share"},
+            "sxy": {"$sum": {"$map": {"input": "$waves", "as": "p", "in": {"$multiply": ["$$p.wave", "$$p.share"]}}}},
+            "sxx": {"$sum": {"$map": {"input": "$waves", "as": "p", "in": {"$multiply": ["$$p.wave", "$$p.wave"]}}}}
+        }},
+        {"$set": {
+            "trend": linear_slope,
+            "total_delta": {"$subtract": [{"$last": "$waves.share"}, {"$first": "$waves.share"}]}
+        }},
+        {"$group": {
+            "_id": "$_id.text",
+            "type": {"$first": "$type"},
+            "index": {"$min": "$index"},
+            "question_waves": {"$first": "$question_waves"},
+            "answers": {"$push": {
+                "answer": "$_id.answer", "waves": "$waves",
+                "trend": "$trend", "total_delta": "$total_delta"
+            }}
+        }},
+        {"$sort": {"index": 1, "_id": 1}},
+        {"$project": {"_id": 0, "text": "$_id", "type": 1, "question_waves": 1, "answers": 1}}
+    ]
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _compare(survey_ids, version_key):
+    # version_key лише робить ключ кешу залежним від версій хвиль
+    return list(get_db(read_only=True).questions.aggregate(comparison_pipeline(list(survey_ids))))
+
+def get_series_comparison(series):
+    """(хвилі, порівняння); повторні запити до незміненої серії беруться з кешу"""
+    waves = get_series_waves(series)
+    survey_ids = tuple(w["id"] for w in waves)
+    version_key = tuple(w.get("version", 0) for w in waves)
+    return waves, _compare(survey_ids, version_key)
@@ -0,0 +1,138 @@
+import html
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from utils.db import get_survey_by_id, get_survey_version
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshots")
+# Протягом цього часу знімок віддається без жодного звернення до БД
+SNAPSHOT_TTL = 300
+# Скільки текстових відповідей показує дашборд (AI отримує всі)
+TEXT_DISPLAY_LIMIT = 300
+
+def build_view(survey):
+    """Готує все, що потрібно для відображення дашборду, у JSON-сумісному вигляді"""
+    # pandas/plotly потрібні лише для перебудови — читання знімка обходиться без них
+    from utils.charts import (
+        question_frame, build_figure, generate_insight, clean_question_title, ai_input
+    )
+
+    questions = []
+    for i, q in enumerate(survey.get('questions', [])):
+        q_type = q.get('type', 'single_choice')
+        q_data = q.get('data', {})
+        if not q_data: continue
+
+        df = question_frame(q_type, q_data)
+        fig = build_figure(df, q_type, q_data)
+        txt, status, val, pct = generate_insight(df, q_type)
+        data, data_type = ai_input(df, q_type, q_data)
+
+        questions.append({
+            "index": i,
+            "text": clean_question_title(q.get('text', 'Питання')),
+            "type": q_type,
+            "answers": df['Text'].head(TEXT_DISPLAY_LIMIT).tolist() if q_type == 'text' else [],
+            "answer_count": len(df) if q_type == 'text' else None,
+            "figure": json.loads(fig.to_json()) if fig is not None else None,
+            "insight": [txt, status, val, float(pct)],
+            "ai_analysis": q.get('ai_analysis'),
+            "ai_input": data,
+            "ai_type": data_type
+        })
+
+    return {
+        "id": survey.get('id'),
+        "version": survey.get('version', 0),
+        "title": survey.get('title'),
+        "series": survey.get('series'),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "missing_analysis": any(not q.get('ai_analysis') for q in survey.get('questions', [])),
+        "questions": questions
+    }
+
+def snapshot_path(survey_id, ext="json"):
+    return os.path.join(SNAPSHOT_DIR, f"{survey_id}.{ext}")
+
+def _write_atomic(path, content):
+    # Унікальний тимчасовий файл: сесії та фонові задачі пишуть знімки з різних потоків одного процесу
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def render_html(view):
+    parts = [f"<h1>{html.escape(str(view['title']))}</h1>"]
+    include_js = "cdn"
+    for q in view["questions"]:
+        parts.append(f"<section><h2>{q['index'] + 1}. {html.escape(q['text'])}</h2>")
+        if q["figure"]:
+            import plotly.io as pio
+            fig = pio.from_json(json.dumps(q["figure"]))
+            parts.append(fig.to_html(full_html=False, include_plotlyjs=include_js))
+            include_js = False
+        for answer in q["answers"]:
+            parts.append(f"<blockquote>{html.escape(str(answer))}</blockquote>")
+        parts.append(f"<p>{html.escape(q['insight'][0])}</p>")
+        if q["ai_analysis"]:
+            parts.append(f"<p><b>🤖 Висновок AI:</b> {html.escape(q['ai_analysis'])}</p>")
+        parts.append("</section>")
+    body = "\n".join(parts)
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(str(view['title']))}</title></head><body>{body}</body></html>"
+
+def write_snapshot(view, with_html=False):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    _write_atomic(snapshot_path(view["id"]), json.dumps(view, ensure_ascii=False, default=str))
+    if with_html:
+        _write_atomic(snapshot_path(view["id"], "html"), render_html(view))
+
+def read_snapshot(survey_id):
+    try:
+        with open(snapshot_path(survey_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def invalidate_snapshot(survey_id):
+    for ext in ("json", "html"):
+        try:
+            os.remove(snapshot_path(survey_id, ext))
+        except FileNotFoundError:
+            pass
+
+def generate_snapshot(survey_id, with_html=False, read_only=True):
+    """HTML дашборд не використовує, а його рендер повільний (перепарсинг кожної фігури),
+    тож на шляху запиту будується лише JSON; HTML — у build_snapshots.py"""
+    survey = get_survey_by_id(survey_id, read_only=read_only)
+    if not survey: return None
+    view = build_view(survey)
+    write_snapshot(view, with_html)
+    return view
+
+def refresh_snapshot(survey_id):
+    """Після запису: перебудова з primary, щоб знімок не взяв застарілу репліку.
+    Застарілий HTML видаляється; новий з'явиться після наступного build_snapshots.py"""
+    invalidate_snapshot(survey_id)
+    return generate_snapshot(survey_id, read_only=False)
+
+def get_survey_view(survey_id):
+    """Свіжий знімок з диска, інакше — перебудова з БД"""
+    view = read_snapshot(survey_id)
+    if view:
+        path = snapshot_path(survey_id)
+        try:
+            if time.time() - os.path.getmtime(path) < SNAPSHOT_TTL:
+                return view
+            # Після TTL перевіряємо лише номер версії, а не весь документ
+            if get_survey_version(survey_id, read_only=True) == view.get("version"):
+                os.utime(path)
+                return view
+        except FileNotFoundError:
+            pass
+    return generate_snapshot(survey_id)
@@ -0,0 +1,87 @@
+"""Проміжні дані імпорту між кроками адмін-панелі.
+
+Невелика таблиця лишається в session_state, а велика скидається у тимчасовий файл Arrow IPC
+(Feather без стиснення), і в сесії зберігається лише дескриптор. Файл відкривається через
+memory map, тож паралельні імпорти займають диск, а не пам'ять воркера. Файли видаляються
+після збереження опитування, а покинуті сесіями — після STAGING_TTL.
+"""
+import os
+import tempfile
+import time
+import uuid
+
+STAGING_DIR = os.path.join(tempfile.gettempdir(), "youthpulse-import")
+# Таблиці, більші за цей розмір у пам'яті, скидаються на диск
+MAX_IN_MEMORY_BYTES = 5 * 1024 * 1024
+# Файл без звернень довше за цей час вважається покинутим (сесію закрили посеред імпорту)
+STAGING_TTL = 2 * 60 * 60
+
+def frame_size(df):
+    return int(df.memory_usage(deep=True).sum())
+
+def _arrow_safe(df):
+    """Object-колонки зі змішаними типами (read_excel: 18 поряд з "18+") як рядки; порожні лишаються
+    порожніми. Імпорт і так працює з текстом відповідей (normalize_text, astype(str))"""
+    object_columns = df.select_dtypes(include="object").columns
+    if not len(object_columns):
+        return df
+    df = df.copy()
+    for col in object_columns:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def stage_frame(df):
+    """Дескриптор для session_state: {"frame": df} або {"path": ..., "columns": [...], "rows": n}"""
+    if frame_size(df) <= MAX_IN_MEMORY_BYTES:
+        return {"frame": df}
+
+    import pyarrow as pa
+    from pyarrow import feather
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}.arrow")
+    try:
+        # Без стиснення, щоб читання з memory map не копіювало буфери
+        feather.write_feather(_arrow_safe(df), path, compression="uncompressed")
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Те, що Arrow не серіалізує і після приведення до рядків, лишається в пам'яті
+        if os.path.exists(path): os.remove(path)
+        return {"frame": df}
+    return {"path": path, "columns": df.columns.tolist(), "rows": len(df)}
+
+def staged_columns(handle):
+    return handle["frame"].columns.tolist() if "frame" in handle else handle["columns"]
+
+def load_frame(handle, columns=None):
+    """DataFrame з дескриптора; None, якщо файл уже прибрано за таймаутом"""
+    if "frame" in handle:
+        return handle["frame"][columns] if columns else handle["frame"]
+
+    path = handle["path"]
+    if not os.path.exists(path):
+        return None
+    from pyarrow import feather
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    # Оновлюємо час доступу, щоб активний імпорт не вважався покинутим
+    os.utime(path)
+    return table.to_pandas()
+
+def discard_frame(handle):
+    if handle and "path" in handle and os.path.exists(handle["path"]):
+        os.remove(handle["path"])
+
+def cleanup_stale(max_age=STAGING_TTL):
+    """Прибирає файли сесій, що не завершили імпорт"""
+    if not os.path.isdir(STAGING_DIR):
+        return 0
+    removed = 0
+    deadline = time.time() - max_age
+    for name in os.listdir(STAGING_DIR):
+        path = os.path.join(STAGING_DIR, name)
+        try:
+            if os.path.getmtime(path) < deadline:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            # Паралельна сесія вже прибрала цей файл
+            continue
+    return removed
@@ -0,0 +1,168 @@
+"""Локальне стискання відкритих відповідей перед відправкою в AI.
+
+1. Майже-дублікати схлопуються через MinHash по символьних шинглах (LSH-бакети).
+2. Унікальні групи кластеризуються k-means по TF-IDF векторах.
+3. Від кожного кластера береться відповідь, найближча до центроїда, разом з розміром кластера.
+
+Працює лише на CPU і numpy, тож викликається синхронно перед запитом до моделі.
+"""
+import re
+import zlib
+from collections import Counter
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Розмір словника TF-IDF: щільна матриця float32 N × MAX_FEATURES
+MAX_FEATURES = 1000
+# Скільки унікальних груп бере участь у k-means; решта лише приписується до кластерів
+MAX_CLUSTER_INPUT = 2000
+# Більше відповідей не обробляється: береться випадкова (не за порядком файлу) вибірка,
+# а лічильники масштабуються на всі відповіді
+MAX_SAMPLER_INPUT = 20000
+
+def _normalize(text):
+    return " ".join(re.findall(r"\w+", str(text).lower()))
+
+def _terms(text):
+    return [t for t in _normalize(text).split() if len(t) > 2]
+
+def shingles(text, k=4):
+    text = _normalize(text)
+    if len(text) <= k: return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+def minhash_signatures(texts, num_perm=64, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text)], dtype=np.uint64)
+        # (a * h + b) mod p; множення по модулю 2^64 достатньо для оцінки Жаккара
+        permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+        signatures[row] = permuted.min(axis=0)
+    return signatures
+
+def collapse_near_duplicates(texts, threshold=0.8, bands=16, num_perm=64):
+    """Групує майже однакові відповіді. Повертає [(текст, кількість)] у порядку першої появи"""
+    if not texts: return []
+    signatures = minhash_signatures(texts, num_perm)
+    rows = num_perm // bands
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = {}
+        for idx, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(idx)
+        for members in buckets.values():
+            head = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(head), find(other)
+                if root_a == root_b: continue
+                if np.mean(signatures[head] == signatures[other]) >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    counts = Counter(find(i) for i in range(len(texts)))
+    return [(texts[root], counts[root]) for root in sorted(counts)]
+
+def tfidf_vocabulary(texts, max_features=MAX_FEATURES):
+    """Словник найчастіших термів та їхні idf-ваги"""
+    docs = [set(_terms(text)) for text in texts]
+    doc_freq = Counter(term for doc in docs for term in doc)
+    vocab = {term: i for i, (term, _) in enumerate(doc_freq.most_common(max_features))}
+    df = np.array([doc_freq[term] for term in vocab], dtype=np.float32)
+    return vocab, np.log((1 + len(docs)) / (1 + df)).astype(np.float32) + 1
+
+def tfidf_matrix(texts, vocab, idf):
+    """Нормовані TF-IDF рядки (float32: 1000 відповідей × 1000 термів ≈ 4 MB)"""
+    matrix = np.zeros((len(texts), len(vocab)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term, tf in Counter(_terms(text)).items():
+            if term in vocab: matrix[row, vocab[term]] = tf
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _sq_distances(X, centers):
+    # ||x - c||^2 без тривимірного проміжного масиву
+    return np.maximum((X ** 2).sum(axis=1)[:, None] - 2 * X @ centers.T + (centers ** 2).sum(axis=1)[None, :], 0)
+
+def kmeans(X, k, weights, iters=25, seed=0):
+    """Зважений k-means з ініціалізацією k-means++"""
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(weights, dtype=float)
+    centers = [X[rng.choice(len(X), p=weights / weights.sum())]]
+    # Відстань до найближчого центра оновлюється лише новим центром: O(N·V) на крок
+    min_dist = ((X - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        dist = min_dist * weights
+        if dist.sum() == 0: break
+        centers.append(X[rng.choice(len(X), p=dist / dist.sum())])
+        min_dist = np.minimum(min_dist, ((X - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(iters):
+        new_labels = _sq_distances(X, centers).argmin(axis=1)
+        if labels is not None and np.array_equal(labels, new_labels): break
+        labels = new_labels
+        for c in range(len(centers)):
+            mask = labels == c
+            if mask.any():
+                centers[c] = np.average(X[mask], axis=0, weights=weights[mask])
+    return labels, centers
+
+def representative_sample(answers, limit=40):
+    """Не більше `limit` відповідей, що покривають усі вхідні. Повертає [(текст, к-сть схожих)]"""
+    answers = [a for a in answers if str(a).strip()]
+    if len(answers) <= MAX_SAMPLER_INPUT:
+        return _representative_sample(answers, limit)
+
+    picked = np.random.default_rng(0).choice(len(answers), MAX_SAMPLER_INPUT, replace=False)
+    scale = len(answers) / MAX_SAMPLER_INPUT
+    sample = _representative_sample([answers[i] for i in np.sort(picked)], limit)
+    return [(text, max(1, round(count * scale))) for text, count in sample]
+
+def _representative_sample(answers, limit):
+    groups = collapse_near_duplicates(answers)
+    if len(groups) <= limit:
+        return sorted(groups, key=lambda g: -g[1])
+
+    texts = [text for text, _ in groups]
+    counts = np.array([count for _, count in groups])
+    vocab, idf = tfidf_vocabulary(texts)
+
+    # Кластери будуються на обмеженій випадковій (зваженій за розміром) підмножині груп,
+    # а решта груп потім лише приписується до найближчого центра — тож лічильники покривають усі відповіді
+    rng = np.random.default_rng(0)
+    fit = np.arange(len(texts))
+    if len(texts) > MAX_CLUSTER_INPUT:
+        fit = np.sort(rng.choice(len(texts), MAX_CLUSTER_INPUT, replace=False, p=counts / counts.sum()))
+    X = tfidf_matrix([texts[i] for i in fit], vocab, idf)
+    fit_labels, centers = kmeans(X, limit, counts[fit])
+
+    labels = np.empty(len(texts), dtype=int)
+    labels[fit] = fit_labels
+    rest = np.setdiff1d(np.arange(len(texts)), fit)
+    for start in range(0, len(rest), MAX_CLUSTER_INPUT):
+        chunk = rest[start:start + MAX_CLUSTER_INPUT]
+        labels[chunk] = _sq_distances(tfidf_matrix([texts[i] for i in chunk], vocab, idf), centers).argmin(axis=1)
+
+    sample = []
+    for c in range(len(centers)):
+        members = np.flatnonzero(fit_labels == c)
+        if not len(members): continue
+        closest = fit[members[((X[members] - centers[c]) ** 2).sum(axis=1).argmin()]]
+        sample.append((texts[closest], int(counts[labels == c].sum())))
+    return sorted(sample, key=lambda g: -g[1])
+
+def format_sample(sample):
+    return [f"{text} (×{count})" if count > 1 else text for text, count in sample]